@@ -5,6 +5,7 @@ from database import DatabaseManager
 from blake3 import blake3
 from utils import *
 from file_processor import FileProcessor, ProcessingStatus
+from scheduler import ProcessingScheduler, JobTooLargeError, JobAlreadyScheduledError
 from flask import Flask, render_template, request, redirect, url_for, send_file, jsonify
 from werkzeug.utils import secure_filename
 from flask_cors import CORS
@@ -15,12 +16,27 @@ app = Flask(__name__)
 CORS(app)
 
 db_manager = DatabaseManager("./files_database.db")
-file_processor = FileProcessor()
+file_processor = FileProcessor(db_manager=db_manager)
 
 app.config['MAX_CONTENT_LENGTH'] = 20 * 1024 * 1024 #max allowed size of a single file
 
 ALLOWED_EXTENSIONS = ['jpg', 'jpeg', 'png']
 
+# admission control of the processing queue
+OCR_MEMORY_BUDGET = 4 * 1024 * 1024 * 1024 #max estimated memory of the files processed at the same time
+OCR_MAX_QUEUE_LENGTH = 100 #max number of files waiting to be processed
+OCR_MAX_CLIENT_WORK = 1_000_000_000 #max number of pixels a single client may have waiting to be rendered
+
+scheduler = ProcessingScheduler(
+    file_processor.file_handler,
+    memory_budget=OCR_MEMORY_BUDGET,
+    max_queue_length=OCR_MAX_QUEUE_LENGTH,
+    max_client_work=OCR_MAX_CLIENT_WORK
+)
+
+SEARCH_RESULTS_PER_PAGE = 20
+SEARCH_MAX_RESULTS_PER_PAGE = 100
+
 
 @app.route('/', methods=['GET'])
 def index():
@@ -59,6 +75,11 @@ def upload():
     
     uploaded_files = request.files.getlist('files')
 
+    # files are admitted one by one, so the response lists which files were accepted and which can be retried
+    accepted_files = []
+    rejected_files = []
+    retry_after = None
+
     for uploaded_file in uploaded_files:
         if uploaded_file.filename == '':
             return jsonify({'error': 'No selected file'}), 400
@@ -83,14 +104,55 @@ def upload():
         if excluded_files:
             return jsonify({'error': f'File(s) with equal content {", ".join(excluded_files)} already exists'}), 400
 
-        # add file to process queue
-        file_processor.file_handler.add_file_to_process_queue(original_filename)
-
-        uploaded_file.save(os.path.join(file_processor.path_dir_upload_folder, original_filename))
+        # estimate the cost of processing the file from its page count and pixel dimensions
+        file_extension = original_filename.rsplit('.', 1)[-1].lower()
+        try:
+            file_cost = file_processor.estimate_cost(file_bytes=uploaded_file.read(), file_type=file_extension)
+        except Exception as e:
+            return jsonify({'error': f'File {uploaded_file.filename} could not be read: {str(e)}'}), 400
+        finally:
+            uploaded_file.seek(0)
+
+        # reserve a place in the process queue before saving, so a rejected file is never written to the upload folder
+        try:
+            file_retry_after = scheduler.submit(original_filename, file_cost, client=request.remote_addr, reserve=True)
+        except JobTooLargeError as e:
+            rejected_files.append({'file': uploaded_file.filename, 'status': 413, 'error': str(e)})
+            continue
+        except JobAlreadyScheduledError as e:
+            rejected_files.append({'file': uploaded_file.filename, 'status': 409, 'error': str(e)})
+            continue
+
+        if file_retry_after is not None:
+            retry_after = max(retry_after or 0, file_retry_after)
+            rejected_files.append({'file': uploaded_file.filename, 'status': 429, 'error': 'Too many files waiting to be processed'})
+            continue
+
+        try:
+            uploaded_file.save(os.path.join(file_processor.path_dir_upload_folder, original_filename))
+        except Exception:
+            scheduler.cancel(original_filename)
+            raise
+
+        scheduler.confirm(original_filename)
+        accepted_files.append(uploaded_file.filename)
 
     db_manager.fill_database(file_processor.path_dir_upload_folder, "uploaded_files")
 
     remove_invalid_files(file_processor.path_dir_upload_folder, ALLOWED_EXTENSIONS)   
+
+    if rejected_files:
+        response = jsonify({
+            'error': f'{len(rejected_files)} file(s) were not accepted, only the rejected files should be uploaded again',
+            'accepted': accepted_files,
+            'rejected': rejected_files
+        })
+
+        # a full queue is temporary, so tell the client when to retry
+        if retry_after is not None:
+            return response, 429, {'Retry-After': str(retry_after)}
+
+        return response, rejected_files[0]['status']
     
     return redirect(url_for('index'))
 
@@ -103,8 +165,7 @@ def process():
     if not uploaded_files:
         return jsonify({"message": "Upload folder is empty. No files to process."})
 
-    processed_uploaded_files = []
-
+    # queue unprocessed files that are not in the queue (e.g. left over from a previous run or removed from the output folder)
     for file_name in uploaded_files:
         file_path = os.path.join(file_processor.path_dir_upload_folder, file_name)
 
@@ -117,20 +178,73 @@ def process():
                 # check if there are matching stems in the processed_files table
                 matching_files = db_manager.get_matching_files_in_db("processed_files", file_stem)
 
-                if not matching_files:
-                    result = file_processor.process_file(file_path)
-
-                    if result['status'] == 'success':
-                        processed_uploaded_files.append(file_name)
+                if not matching_files and not scheduler.is_scheduled(file_stem):
+                    scheduler.submit(file_name, file_processor.estimate_cost(file_path), enforce_limits=False)
             except Exception as e:
-                print(f"Error processing file {file_name}: {str(e)}")
+                print(f"Error queueing file {file_name}: {str(e)}")
+
+    processed_uploaded_files = []
+
+    # process queued files until the queue is empty or the memory budget is used by other requests
+    while True:
+        file_obj = scheduler.next_job()
+        if file_obj is None:
+            break
+
+        try:
+            result = file_processor.process_file(file_obj.path)
+        finally:
+            scheduler.release(file_obj)
+
+        if result['status'] == 'success':
+            processed_uploaded_files.append(os.path.basename(file_obj.path))
 
     # update the database after processing all files
     db_manager.fill_database(file_processor.path_dir_output_folder, "processed_files")
 
+    if not processed_uploaded_files and scheduler.has_queued_jobs():
+        retry_after = scheduler.retry_after()
+        return jsonify({'error': f'Server is busy processing other files. Retry in {retry_after} seconds.'}), 429, {'Retry-After': str(retry_after)}
+
     response_message = f"Processing completed. Processed files: {processed_uploaded_files}"
     return jsonify({"message": response_message})
 
+
+@app.route('/search', methods=['GET'])
+def search():
+    query = request.args.get('q', '').strip()
+
+    if not query:
+        return jsonify({'error': 'No search query. Use the q parameter, e.g. /search?q=invoice'}), 400
+
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', SEARCH_RESULTS_PER_PAGE, type=int)
+
+    if page < 1 or per_page < 1:
+        return jsonify({'error': 'page and per_page must be positive integers'}), 400
+
+    per_page = min(per_page, SEARCH_MAX_RESULTS_PER_PAGE)
+
+    # the query is a list of words, unless FTS5 query syntax is asked for with syntax=fts5
+    raw = request.args.get('syntax') == 'fts5'
+
+    try:
+        total, hits = db_manager.search_processed_text(query, limit=per_page, offset=(page - 1) * per_page, raw=raw)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'query': query,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'results': [{
+            'filename': filename,
+            'snippet': snippet,
+            'rank': rank
+        } for filename, snippet, rank in hits]
+    })
+
 # NOTE: the {zip_checksum}.zip varies from each download dispite no changes to the files (mainly due to changes in timestamps).
 @app.route('/download_output', methods=['GET'])
 def download_output():
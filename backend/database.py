@@ -30,6 +30,46 @@ class DatabaseManager:
                         file_size_mb DOUBLE
                     )
                 ''')
+
+                # the first version of the search index was a single fts5 table named processed_text.
+                # it is rebuilt from the output folder by sync_processed_text
+                cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'processed_text'")
+                row = cursor.fetchone()
+                if row is not None and row[0].upper().startswith('CREATE VIRTUAL TABLE'):
+                    cursor.execute('DROP TABLE processed_text')
+
+                # extracted text of the processed files, keyed by the name of the output file
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS processed_text (
+                        id INTEGER PRIMARY KEY,
+                        filename TEXT UNIQUE,
+                        content TEXT
+                    )
+                ''')
+                # full-text index over processed_text, kept up to date by the triggers below
+                cursor.execute('''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS processed_text_fts USING fts5 (
+                        content,
+                        content='processed_text',
+                        content_rowid='id'
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TRIGGER IF NOT EXISTS processed_text_insert AFTER INSERT ON processed_text BEGIN
+                        INSERT INTO processed_text_fts (rowid, content) VALUES (new.id, new.content);
+                    END
+                ''')
+                cursor.execute('''
+                    CREATE TRIGGER IF NOT EXISTS processed_text_delete AFTER DELETE ON processed_text BEGIN
+                        INSERT INTO processed_text_fts (processed_text_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                    END
+                ''')
+                cursor.execute('''
+                    CREATE TRIGGER IF NOT EXISTS processed_text_update AFTER UPDATE ON processed_text BEGIN
+                        INSERT INTO processed_text_fts (processed_text_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                        INSERT INTO processed_text_fts (rowid, content) VALUES (new.id, new.content);
+                    END
+                ''')
             conn.commit()
 
             print("Database created successfully.")
@@ -56,6 +96,9 @@ class DatabaseManager:
                 conn.commit()
                 print(f"Database {table_name} filled successfully.")
 
+            if table_name == "processed_files":
+                self.sync_processed_text(folder_path)
+
         except Exception as e:
             print(f"Error filling database: {str(e)}")
 
@@ -85,7 +128,7 @@ class DatabaseManager:
             # remove the identified files from the database
             for filename in files_to_remove_from_db:
                 cursor.execute(f'DELETE FROM {table_name} WHERE filename = ?', (filename,))
-            
+
             # identify file names present in the folder but not in the database
             files_to_add_to_db = files_folder - db_files
             
@@ -103,6 +146,41 @@ class DatabaseManager:
 
         conn.commit()
 
+        if table_name == "processed_files":
+            self.sync_processed_text(folder_path)
+
+
+    def sync_processed_text(self, folder_path):
+        """
+        Synchronize the full-text search index with the text files in the output folder.
+
+        Files without an index entry (e.g. processed before the index existed or added to the folder by hand) are
+        indexed, and index entries of files no longer in the folder are removed.
+
+        Args:
+            folder_path (str): The path to the output folder.
+
+        Returns:
+            None: The function modifies the processed_text table in place.
+        """
+        files_folder = set(os.listdir(folder_path))
+        with self.db_connection() as conn:
+            cursor = conn.cursor()
+
+            # only reads the filename index, not the stored text
+            cursor.execute('SELECT filename FROM processed_text')
+            indexed_files = set(row[0] for row in cursor.fetchall())
+
+            for filename in indexed_files - files_folder:
+                cursor.execute('DELETE FROM processed_text WHERE filename = ?', (filename,))
+
+            for filename in files_folder - indexed_files:
+                with open(os.path.join(folder_path, filename), 'r', encoding='utf-8', errors='replace') as text_file:
+                    # ignored if the file was indexed by process_file in the meantime
+                    cursor.execute('INSERT OR IGNORE INTO processed_text (filename, content) VALUES (?, ?)', (filename, text_file.read()))
+
+        conn.commit()
+
 
     def add_processed_file(self, filename, checksum, table_name="uploaded_files"):
         with self.db_connection() as conn:
@@ -147,3 +225,88 @@ class DatabaseManager:
 
             result = cursor.fetchall()
             return result
+
+
+    def index_processed_text(self, filename, text):
+        """
+        Add the extracted text of a processed file to the full-text search index.
+
+        Args:
+            filename (str): The name of the output file the text was written to.
+            text (str): The extracted text. Replaces any text previously indexed for the file.
+
+        Returns:
+            None: The function modifies the processed_text table in place.
+        """
+        with self.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO processed_text (filename, content) VALUES (?, ?)
+                ON CONFLICT (filename) DO UPDATE SET content = excluded.content
+            ''', (filename, text))
+
+        conn.commit()
+
+
+    def search_processed_text(self, query, limit=20, offset=0, raw=False):
+        """
+        Search the extracted text of the processed files.
+
+        Args:
+            query (str): The words to search for. A file matches if its text contains all of them.
+            limit (int, optional): The maximum number of hits to return (default is 20).
+            offset (int, optional): The number of hits to skip, used for pagination (default is 0).
+            raw (bool, optional): If True, the query is used as an FTS5 query (e.g. '"exact phrase"' or 'tax OR vat')
+                instead of a list of words (default is False).
+
+        Returns:
+            tuple: The total number of hits and a list of (filename, snippet, rank) tuples, most relevant first.
+
+        Raises:
+            ValueError: If raw is True and the query is not a valid FTS5 query.
+        """
+        if raw:
+            validate_fts_query(query)
+        else:
+            # quote every word so characters like - : . + ' are searched for instead of parsed as query syntax
+            query = ' '.join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+        with self.db_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('SELECT COUNT(*) FROM processed_text_fts WHERE processed_text_fts MATCH ?', (query,))
+            total = cursor.fetchone()[0]
+
+            # rank is the bm25 score, lower values are more relevant
+            cursor.execute('''
+                SELECT processed_text.filename, snippet(processed_text_fts, 0, '[', ']', '...', 16), processed_text_fts.rank
+                FROM processed_text_fts
+                JOIN processed_text ON processed_text.id = processed_text_fts.rowid
+                WHERE processed_text_fts MATCH ?
+                ORDER BY processed_text_fts.rank
+                LIMIT ? OFFSET ?
+            ''', (query, limit, offset))
+
+            return total, cursor.fetchall()
+
+
+def validate_fts_query(query):
+    """
+    Check that a query is a valid FTS5 query for the processed_text_fts table.
+
+    The query is run against an empty in-memory table, so syntax errors are told apart from errors of the database itself.
+
+    Args:
+        query (str): The FTS5 query.
+
+    Raises:
+        ValueError: If the query is not a valid FTS5 query.
+    """
+    with sqlite3.connect(':memory:') as conn:
+        cursor = conn.cursor()
+        cursor.execute('CREATE VIRTUAL TABLE processed_text_fts USING fts5 (content)')
+        try:
+            cursor.execute('SELECT 1 FROM processed_text_fts WHERE processed_text_fts MATCH ?', (query,))
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query: {str(e)}") from e
+    conn.close()
@@ -62,11 +62,33 @@ class FileHandler:
             self.files.append(p_file)
         
 
-    def add_file_to_process_queue(self, file_name: str):
-        """Adds a file to the processing queue given its ID/name."""
+    def add_file_to_process_queue(self, file_name: str, client: str = None, cost=None):
+        """
+        Adds a file to the processing queue given its ID/name.
+
+        Args:
+            file_name (str): The name of the file in the upload folder.
+            client (str, optional): The client that submitted the file.
+            cost (JobCost, optional): The estimated cost of processing the file.
+
+        Returns:
+            ProcessFile: The queued file.
+        """
 
         stem_file_name = Path(file_name).stem
-        file = ProcessFile(stem_file_name, ProcessingStatus.PENDING)
-        self.files.append(file)
+
+        # reuse the file already known to the handler (e.g. found in the upload folder on startup)
+        file = next((f for f in self.files if f.name == stem_file_name), None)
+        if file is None:
+            file = ProcessFile(stem_file_name)
+            self.files.append(file)
+
+        file.status = ProcessingStatus.PENDING
+        file.path = str(Path(self.path_dir_upload_folder) / file_name)
+        file.client = client
+        file.cost = cost
+
         self.processing_queue.append(file)
-        print(f"File {file_name} added to the process queue.", flush=True)
\ No newline at end of file
+        print(f"File {file_name} added to the process queue.", flush=True)
+
+        return file
\ No newline at end of file
@@ -4,13 +4,20 @@ import pytesseract
 from PIL import Image
 from file_handler import FileHandler
 from processfile import ProcessFile, ProcessingStatus
+from scheduler import estimate_job_cost
 
 
 class FileProcessor:
-    def __init__(self, app_folder: str = "app_folder"):
+    def __init__(self, app_folder: str = "app_folder", db_manager=None):
         self.path_dir_upload_folder = f"{app_folder}/upload"
         self.path_dir_output_folder = f"{app_folder}/output"
-        
+
+        # used to index the extracted text for search, indexing is skipped if None
+        self.db_manager = db_manager
+
+        # zoom factor the pages are rendered at before OCR
+        self.zoom = 4
+
         self.file_handler = FileHandler(
             self.path_dir_upload_folder, 
             self.path_dir_output_folder
@@ -74,8 +81,7 @@ class FileProcessor:
             dict: A dictionary containing the status and a message indicating the outcome of the processing operation.
         """
         try:
-            zoom = 4
-            mat = fitz.Matrix(zoom, zoom)
+            mat = fitz.Matrix(self.zoom, self.zoom)
 
             # remove any file extension from the filename
             file_id, _ = os.path.splitext(os.path.basename(file_path))
@@ -88,11 +94,21 @@ class FileProcessor:
                     break
 
             doc = fitz.open(file_path)
+            page_texts = []
 
             for page in doc:
                 pix = page.get_pixmap(matrix=mat)
                 text = self.image_to_text_from_pixmap(pix)
                 self.append_text_to_file(file_text_path, text)
+                page_texts.append(text)
+
+            # index the extracted text so it can be found through /search.
+            # the text file is already written, so a failed index write must not fail the processing
+            if self.db_manager is not None:
+                try:
+                    self.db_manager.index_processed_text(os.path.basename(file_text_path), '\n'.join(page_texts))
+                except Exception as e:
+                    print(f"Error indexing text of {file_path}: {e}")
 
             # find the corresponding file in the queue and update its status to COMPLETED
             for file_obj in self.file_handler.files:
@@ -114,6 +130,23 @@ class FileProcessor:
             return {"status": "error", "message": f"Error processing {file_path}: {e}"}
 
 
+    def estimate_cost(self, file_path=None, file_bytes=None, file_type=None):
+        """
+        Estimates the cost of processing a file from its page count and pixel dimensions.
+
+        Args:
+            file_path (str, optional): The path to the file.
+            file_bytes (bytes, optional): The content of the file, used instead of file_path (e.g. for uploads not yet saved).
+            file_type (str, optional): The file extension, required when file_bytes is given.
+
+        Returns:
+            JobCost: The estimated peak memory in bytes and the number of pixels to render.
+        """
+
+        with fitz.open(file_path, stream=file_bytes, filetype=file_type) as doc:
+            return estimate_job_cost(doc, self.zoom)
+
+
     def list_files_in_queue(self):
         """
         Lists all files in the file handler.
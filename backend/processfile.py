@@ -7,6 +7,10 @@ class ProcessingStatus(Enum):
     ERROR = auto()
 
 class ProcessFile:
-    def __init__(self, name: str, status = ProcessingStatus.PENDING):
+    def __init__(self, name: str, status = ProcessingStatus.PENDING, path: str = None, client: str = None, cost = None):
         self.name = name
         self.status = status
+        # set when the file is added to the processing queue
+        self.path = path
+        self.client = client
+        self.cost = cost
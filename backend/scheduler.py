@@ -0,0 +1,236 @@
+import math
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from processfile import ProcessingStatus
+
+# pages are rendered as RGB pixmaps
+BYTES_PER_PIXEL = 3
+
+# copies of a rendered page held at the same time by FileProcessor.image_to_text_from_pixmap:
+# the Pixmap, the bytes copy returned by Pixmap.samples and the PIL image created from it
+PAGE_BUFFERS = 3
+
+# rendered pixels per second, used until the throughput has been measured
+DEFAULT_THROUGHPUT = 2_000_000
+
+MAX_RETRY_AFTER = 300
+
+JobCost = namedtuple("JobCost", ["memory", "work"])
+
+
+class JobTooLargeError(Exception):
+    """Raised when a file needs more memory than the whole memory budget."""
+
+
+class JobAlreadyScheduledError(Exception):
+    """Raised when a file with the same name (without extension) is already queued or being processed."""
+
+
+def estimate_job_cost(doc, zoom):
+    """
+    Estimates the cost of extracting text from a document without rendering it.
+
+    Args:
+        doc (fitz.Document): The opened document (an image has a single page).
+        zoom (float): The zoom factor the pages are rendered at.
+
+    Returns:
+        JobCost: memory is the peak memory in bytes, i.e. the largest page held as a Pixmap, as the bytes copy of its
+            samples and as a PIL image (PAGE_BUFFERS). work is the total number of rendered pixels over all pages.
+    """
+
+    page_pixels = [page.rect.width * zoom * page.rect.height * zoom for page in doc]
+    largest_page = max(page_pixels, default=0)
+
+    return JobCost(memory=int(largest_page * BYTES_PER_PIXEL * PAGE_BUFFERS), work=int(sum(page_pixels)))
+
+
+class ProcessingScheduler:
+    """
+    Admission control and scheduling of the files in the processing queue.
+
+    Files are admitted only while the queue and the client's share of it are below their limits, and never if they
+    need more memory than the memory budget. Queued files are dispatched fairly between clients, shortest job first
+    within a client, and only while the estimated memory of the files being processed stays within the memory budget.
+
+    A file can be reserved a place in the queue before it is saved to the upload folder. It is not dispatched until
+    the reservation is confirmed.
+    """
+
+    def __init__(self, file_handler, memory_budget, max_queue_length, max_client_work):
+        self.file_handler = file_handler
+        self.memory_budget = memory_budget
+        self.max_queue_length = max_queue_length
+        self.max_client_work = max_client_work
+
+        self._lock = threading.Lock()
+        self._in_flight = {}  # ProcessFile -> start time
+        self._in_flight_memory = 0
+        self._reserved = set()  # names (without extension) of queued files not yet saved
+        self._throughput = DEFAULT_THROUGHPUT
+
+        # fair queueing: a client's next job is ranked by the work the client has been served so far
+        self._finish_tags = {}
+        self._virtual_time = 0
+
+
+    def submit(self, file_name, cost, client=None, enforce_limits=True, reserve=False):
+        """
+        Adds a file to the processing queue if the queue has room for it.
+
+        Args:
+            file_name (str): The name of the file in the upload folder.
+            cost (JobCost): The estimated cost of processing the file.
+            client (str, optional): The client that submitted the file.
+            enforce_limits (bool, optional): If False, the file is queued regardless of the queue limits (default is True).
+            reserve (bool, optional): If True, the file is not dispatched until confirm() is called (default is False).
+
+        Returns:
+            int: None if the file was queued, otherwise the number of seconds the client should wait before retrying.
+
+        Raises:
+            JobTooLargeError: If the file needs more memory than the memory budget.
+            JobAlreadyScheduledError: If a file with the same name (without extension) is queued or being processed.
+        """
+
+        if cost.memory > self.memory_budget:
+            raise JobTooLargeError(
+                f"File {file_name} needs an estimated {cost.memory} bytes, the memory budget is {self.memory_budget} bytes"
+            )
+
+        with self._lock:
+            queue = self.file_handler.processing_queue
+
+            # the output file is named after the stem, so files with the same stem cannot be scheduled at the same time
+            if self._is_scheduled(Path(file_name).stem):
+                raise JobAlreadyScheduledError(f"A file named {Path(file_name).stem} is already waiting to be processed")
+
+            if enforce_limits:
+                if len(queue) >= self.max_queue_length:
+                    return self._retry_after(sum(f.cost.work for f in queue))
+
+                # a client's first file is admitted regardless of the client limit
+                client_work = sum(f.cost.work for f in queue if f.client == client)
+                if client_work > 0 and client_work + cost.work > self.max_client_work:
+                    return self._retry_after(client_work)
+
+            # an idle client starts at the current virtual time so it cannot claim the time it was idle
+            if not self._has_jobs(client):
+                self._finish_tags[client] = max(self._finish_tags.get(client, 0), self._virtual_time)
+
+            file = self.file_handler.add_file_to_process_queue(file_name, client, cost)
+
+            if reserve:
+                self._reserved.add(file.name)
+
+        return None
+
+
+    def confirm(self, file_name):
+        """Allows a file queued with reserve=True to be dispatched, once it is saved to the upload folder."""
+
+        with self._lock:
+            self._reserved.discard(Path(file_name).stem)
+
+
+    def cancel(self, file_name):
+        """Removes a file queued with reserve=True from the queue, e.g. if it could not be saved."""
+
+        stem_file_name = Path(file_name).stem
+
+        with self._lock:
+            self._reserved.discard(stem_file_name)
+
+            queue = self.file_handler.processing_queue
+            for file in [f for f in queue if f.name == stem_file_name]:
+                queue.remove(file)
+                file.status = ProcessingStatus.ERROR
+
+                if not self._has_jobs(file.client):
+                    self._finish_tags.pop(file.client, None)
+
+
+    def next_job(self):
+        """
+        Removes the next file to process from the processing queue.
+
+        Returns:
+            ProcessFile: The file to process, or None if no saved files are queued or the file does not fit in the memory budget.
+                Every returned file must be handed back through release() once processed.
+        """
+
+        with self._lock:
+            # reserved files are not saved yet
+            queue = [f for f in self.file_handler.processing_queue if f.name not in self._reserved]
+
+            if not queue:
+                return None
+
+            job = min(queue, key=lambda f: (self._finish_tags.get(f.client, 0) + f.cost.work, f.cost.work))
+
+            # wait for memory rather than skipping to smaller files, so large files are not starved
+            if self._in_flight_memory + job.cost.memory > self.memory_budget:
+                return None
+
+            self.file_handler.processing_queue.remove(job)
+
+            start_tag = self._finish_tags.get(job.client, 0)
+            self._finish_tags[job.client] = start_tag + job.cost.work
+            self._virtual_time = max(self._virtual_time, start_tag)
+
+            self._in_flight[job] = time.monotonic()
+            self._in_flight_memory += job.cost.memory
+
+            return job
+
+
+    def release(self, job):
+        """Marks a file returned by next_job() as processed and frees its memory."""
+
+        with self._lock:
+            elapsed = time.monotonic() - self._in_flight.pop(job)
+            self._in_flight_memory -= job.cost.memory
+
+            # moving average of the observed throughput, used to estimate Retry-After
+            if elapsed > 0 and job.cost.work > 0:
+                self._throughput = 0.8 * self._throughput + 0.2 * (job.cost.work / elapsed)
+
+            if not self._has_jobs(job.client):
+                del self._finish_tags[job.client]
+
+
+    def is_scheduled(self, file_name):
+        """Checks whether a file (name without extension) is queued or being processed."""
+
+        with self._lock:
+            return self._is_scheduled(file_name)
+
+
+    def has_queued_jobs(self):
+        """Checks whether any saved files are waiting to be processed."""
+
+        with self._lock:
+            return any(f.name not in self._reserved for f in self.file_handler.processing_queue)
+
+
+    def retry_after(self):
+        """Estimates the number of seconds until the files being processed have completed."""
+
+        with self._lock:
+            return self._retry_after(sum(f.cost.work for f in self._in_flight))
+
+
+    def _retry_after(self, work):
+        return min(max(1, math.ceil(work / self._throughput)), MAX_RETRY_AFTER)
+
+
+    def _is_scheduled(self, file_name):
+        return any(f.name == file_name for f in self.file_handler.processing_queue) or \
+            any(f.name == file_name for f in self._in_flight)
+
+
+    def _has_jobs(self, client):
+        return any(f.client == client for f in self.file_handler.processing_queue) or \
+            any(f.client == client for f in self._in_flight)
@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+# database imports utils, which needs the upload dependencies
+pytest.importorskip("blake3")
+pytest.importorskip("magic")
+
+from database import DatabaseManager
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / "files_database.db"))
+    db_manager.create_database()
+    return db_manager
+
+
+@pytest.fixture
+def output_folder(tmp_path):
+    folder = tmp_path / "output"
+    folder.mkdir()
+    return folder
+
+
+def filenames(hits):
+    return [filename for filename, _, _ in hits]
+
+
+def test_index_replaces_earlier_text(db_manager):
+    db_manager.index_processed_text("a.txt", "first draft")
+    db_manager.index_processed_text("a.txt", "final version")
+
+    assert db_manager.search_processed_text("draft") == (0, [])
+
+    total, hits = db_manager.search_processed_text("final")
+    assert total == 1
+    assert filenames(hits) == ["a.txt"]
+
+
+def test_sync_adds_and_removes_files(db_manager, output_folder):
+    (output_folder / "a.txt").write_text("invoice from the folder", encoding="utf-8")
+    (output_folder / "b.txt").write_text("another invoice", encoding="utf-8")
+
+    db_manager.sync_processed_text(str(output_folder))
+    total, hits = db_manager.search_processed_text("invoice")
+    assert total == 2
+    assert sorted(filenames(hits)) == ["a.txt", "b.txt"]
+
+    (output_folder / "a.txt").unlink()
+    db_manager.sync_processed_text(str(output_folder))
+    total, hits = db_manager.search_processed_text("invoice")
+    assert total == 1
+    assert filenames(hits) == ["b.txt"]
+
+
+def test_sync_keeps_text_indexed_by_process_file(db_manager, output_folder):
+    (output_folder / "a.txt").write_text("last page only", encoding="utf-8")
+    db_manager.index_processed_text("a.txt", "first page\nlast page only")
+
+    db_manager.sync_processed_text(str(output_folder))
+
+    total, hits = db_manager.search_processed_text("first")
+    assert total == 1
+    assert filenames(hits) == ["a.txt"]
+
+
+def test_pagination(db_manager):
+    for i in range(5):
+        db_manager.index_processed_text(f"{i}.txt", "invoice " + "word " * i)
+
+    total, first_page = db_manager.search_processed_text("invoice", limit=2, offset=0)
+    _, second_page = db_manager.search_processed_text("invoice", limit=2, offset=2)
+    _, last_page = db_manager.search_processed_text("invoice", limit=2, offset=4)
+
+    assert total == 5
+    assert len(first_page) == 2 and len(second_page) == 2 and len(last_page) == 1
+    assert len(set(filenames(first_page + second_page + last_page))) == 5
+
+    # most relevant first, the shortest text has the best (lowest) rank
+    ranks = [rank for _, _, rank in first_page + second_page + last_page]
+    assert ranks == sorted(ranks)
+    assert filenames(first_page)[0] == "0.txt"
+
+
+def test_snippet_marks_matches(db_manager):
+    db_manager.index_processed_text("a.txt", "payment of the invoice is due")
+
+    _, hits = db_manager.search_processed_text("invoice")
+
+    assert hits[0][1] == "payment of the [invoice] is due"
+
+
+@pytest.mark.parametrize("query", ["2023-01-01", "e-mail", "don't", "C++", "a.b", '"unterminated', "AND"])
+def test_words_are_not_parsed_as_query_syntax(db_manager, query):
+    db_manager.index_processed_text("a.txt", "sent 2023-01-01 by e-mail, don't use C++ or a.b AND \"unterminated")
+
+    total, hits = db_manager.search_processed_text(query)
+
+    assert total == 1
+    assert filenames(hits) == ["a.txt"]
+
+
+def test_raw_query_syntax(db_manager):
+    db_manager.index_processed_text("a.txt", "tax return")
+    db_manager.index_processed_text("b.txt", "vat return")
+
+    total, _ = db_manager.search_processed_text("tax OR vat", raw=True)
+    assert total == 2
+
+
+@pytest.mark.parametrize("query", ['"unterminated', "AND", "foo:bar"])
+def test_invalid_raw_query_raises_value_error(db_manager, query):
+    with pytest.raises(ValueError):
+        db_manager.search_processed_text(query, raw=True)
+
+
+def test_database_errors_are_not_value_errors(tmp_path):
+    # create_database was never run, this is a server error rather than an invalid query
+    db_manager = DatabaseManager(str(tmp_path / "files_database.db"))
+
+    with pytest.raises(sqlite3.OperationalError):
+        db_manager.search_processed_text("invoice")
+
+    with pytest.raises(sqlite3.OperationalError):
+        db_manager.search_processed_text("invoice", raw=True)
+
+
+def test_first_index_version_is_replaced(tmp_path, output_folder):
+    db_path = str(tmp_path / "files_database.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE VIRTUAL TABLE processed_text USING fts5 (filename UNINDEXED, content)")
+        conn.execute("INSERT INTO processed_text (filename, content) VALUES ('a.txt', 'invoice')")
+    conn.close()
+
+    db_manager = DatabaseManager(db_path)
+    db_manager.create_database()
+
+    (output_folder / "a.txt").write_text("invoice", encoding="utf-8")
+    db_manager.sync_processed_text(str(output_folder))
+
+    assert db_manager.search_processed_text("invoice")[0] == 1
@@ -0,0 +1,175 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from file_handler import FileHandler
+from processfile import ProcessingStatus
+from scheduler import (
+    DEFAULT_THROUGHPUT,
+    MAX_RETRY_AFTER,
+    JobAlreadyScheduledError,
+    JobCost,
+    JobTooLargeError,
+    ProcessingScheduler,
+    estimate_job_cost,
+)
+
+
+@pytest.fixture
+def file_handler(tmp_path):
+    return FileHandler(str(tmp_path), str(tmp_path))
+
+
+def make_scheduler(file_handler, memory_budget=100, max_queue_length=10, max_client_work=10 * DEFAULT_THROUGHPUT):
+    return ProcessingScheduler(file_handler, memory_budget, max_queue_length, max_client_work)
+
+
+def drain(scheduler):
+    """Dispatches and releases queued files one at a time, returning their names in dispatch order."""
+
+    names = []
+    while (job := scheduler.next_job()) is not None:
+        names.append(job.name)
+        scheduler.release(job)
+    return names
+
+
+def test_queue_length_limit(file_handler):
+    scheduler = make_scheduler(file_handler, max_queue_length=2)
+
+    assert scheduler.submit("a.png", JobCost(1, DEFAULT_THROUGHPUT), client="A") is None
+    assert scheduler.submit("b.png", JobCost(1, DEFAULT_THROUGHPUT), client="B") is None
+
+    # retry after the time it takes to render the queued pixels
+    assert scheduler.submit("c.png", JobCost(1, 1), client="C") == 2
+    assert [f.name for f in file_handler.processing_queue] == ["a", "b"]
+
+
+def test_client_limit(file_handler):
+    scheduler = make_scheduler(file_handler, max_client_work=3 * DEFAULT_THROUGHPUT)
+
+    # the first file is admitted even though it exceeds the client limit
+    assert scheduler.submit("a1.png", JobCost(1, 3 * DEFAULT_THROUGHPUT), client="A") is None
+    assert scheduler.submit("a2.png", JobCost(1, 1), client="A") == 3
+
+    # other clients are not affected
+    assert scheduler.submit("b1.png", JobCost(1, DEFAULT_THROUGHPUT), client="B") is None
+
+
+def test_retry_after_is_clamped(file_handler):
+    scheduler = make_scheduler(file_handler, max_queue_length=1)
+
+    scheduler.submit("a.png", JobCost(1, 1), client="A")
+    assert scheduler.submit("b.png", JobCost(1, 1), client="B") == 1
+
+    drain(scheduler)
+    scheduler.submit("c.png", JobCost(1, 10_000 * DEFAULT_THROUGHPUT), client="A")
+    assert scheduler.submit("d.png", JobCost(1, 1), client="B") == MAX_RETRY_AFTER
+
+
+def test_file_larger_than_memory_budget_is_rejected(file_handler):
+    scheduler = make_scheduler(file_handler, memory_budget=100)
+
+    with pytest.raises(JobTooLargeError):
+        scheduler.submit("huge.png", JobCost(101, 1), client="A")
+
+    with pytest.raises(JobTooLargeError):
+        scheduler.submit("huge.png", JobCost(101, 1), enforce_limits=False)
+
+    assert len(file_handler.processing_queue) == 0
+
+
+def test_same_stem_cannot_be_scheduled_twice(file_handler):
+    scheduler = make_scheduler(file_handler)
+
+    scheduler.submit("a.jpg", JobCost(1, 1), client="A")
+    with pytest.raises(JobAlreadyScheduledError):
+        scheduler.submit("a.png", JobCost(1, 1), client="A")
+
+    # still refused while the first file is being processed
+    job = scheduler.next_job()
+    with pytest.raises(JobAlreadyScheduledError):
+        scheduler.submit("a.png", JobCost(1, 1), client="A")
+
+    scheduler.release(job)
+    assert scheduler.submit("a.png", JobCost(1, 1), client="A") is None
+
+
+def test_shortest_job_first(file_handler):
+    scheduler = make_scheduler(file_handler)
+
+    scheduler.submit("large.png", JobCost(1, 300), client="A")
+    scheduler.submit("small.png", JobCost(1, 100), client="A")
+    scheduler.submit("medium.png", JobCost(1, 200), client="A")
+
+    assert drain(scheduler) == ["small", "medium", "large"]
+
+
+def test_fairness_between_clients(file_handler):
+    scheduler = make_scheduler(file_handler)
+
+    for i in range(4):
+        scheduler.submit(f"a{i}.png", JobCost(1, 100), client="A")
+    scheduler.submit("b0.png", JobCost(1, 150), client="B")
+
+    # B does not wait for all of A's files even though its file is larger
+    assert drain(scheduler) == ["a0", "b0", "a1", "a2", "a3"]
+
+
+def test_memory_budget_blocks_dispatch(file_handler):
+    scheduler = make_scheduler(file_handler, memory_budget=100)
+
+    scheduler.submit("a.png", JobCost(60, 1), client="A")
+    scheduler.submit("b.png", JobCost(60, 2), client="B")
+
+    first = scheduler.next_job()
+    assert first.name == "a"
+    assert scheduler.next_job() is None
+    assert scheduler.has_queued_jobs()
+
+    scheduler.release(first)
+    assert scheduler.next_job().name == "b"
+    assert not scheduler.has_queued_jobs()
+
+
+def test_reserved_file_is_not_dispatched_until_confirmed(file_handler):
+    scheduler = make_scheduler(file_handler)
+
+    scheduler.submit("a.png", JobCost(1, 1), client="A", reserve=True)
+
+    # the place in the queue counts for admission, but the file cannot be processed yet
+    assert scheduler.is_scheduled("a")
+    assert not scheduler.has_queued_jobs()
+    assert scheduler.next_job() is None
+    with pytest.raises(JobAlreadyScheduledError):
+        scheduler.submit("a.jpg", JobCost(1, 1), client="B")
+
+    scheduler.confirm("a.png")
+    assert scheduler.has_queued_jobs()
+    assert scheduler.next_job().name == "a"
+
+
+def test_cancelled_reservation_is_removed(file_handler):
+    scheduler = make_scheduler(file_handler)
+
+    scheduler.submit("a.png", JobCost(1, 1), client="A", reserve=True)
+    scheduler.cancel("a.png")
+
+    assert not scheduler.is_scheduled("a")
+    assert len(file_handler.processing_queue) == 0
+    assert [f.status for f in file_handler.files] == [ProcessingStatus.ERROR]
+    assert scheduler.submit("a.png", JobCost(1, 1), client="A") is None
+
+
+def test_estimate_job_cost():
+    page = SimpleNamespace(rect=SimpleNamespace(width=10, height=20))
+    small_page = SimpleNamespace(rect=SimpleNamespace(width=5, height=5))
+
+    cost = estimate_job_cost([page, small_page], zoom=2)
+
+    # largest page at zoom 2 is 800 pixels, held in 3 RGB buffers
+    assert cost == JobCost(memory=800 * 3 * 3, work=800 + 100)